@@ -1,4 +1,10 @@
 """Vega-Lite Viewer MCP server."""
 
+import logging
+
 # Global constants
 LOCALHOST = "localhost"
+# Number of debug log records buffered before writing them to log file, log records
+# with level INFO or higher get written immediately along with all buffered ones
+LOG_BUFFER_CAPACITY = 256
+LOG_BUFFER_FLUSH_LEVEL = logging.INFO
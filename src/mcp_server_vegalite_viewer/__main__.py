@@ -1,21 +1,25 @@
 import argparse
+import atexit
+import importlib.util
 import logging
 import os
 import sys
 import tempfile
+from functools import partial
+from logging.handlers import MemoryHandler
 
-import fastmcp
-from dotenv import load_dotenv
+from . import LOCALHOST, LOG_BUFFER_CAPACITY, LOG_BUFFER_FLUSH_LEVEL
 
-from . import LOCALHOST
-from .mcp_server import VegaLiteViewerError, mcp
-from .web_browser import web_browser
+DEFAULT_VIEWER_PORT = 8000
+
+# Environment variable values considered as enabling a boolean option
+TRUTHY_ENV_VALUES = frozenset({"1", "true", "yes", "on"})
 
 logger = logging.getLogger(__name__)
 
 
-def cli():
-    """Parse command line arguments."""
+def _parse_args():
+    """Parse command line arguments using a full-fledged argument parser."""
     parser = argparse.ArgumentParser(description="Vega-Lite MCP Server and Viewer")
 
     # Server options
@@ -23,8 +27,8 @@ def cli():
         "-p",
         "--port",
         type=int,
-        default=8000,
-        help="Port to run the viewer web server on (default: 8000)",
+        default=DEFAULT_VIEWER_PORT,
+        help=f"Port to run the viewer web server on (default: {DEFAULT_VIEWER_PORT})",
     )
     parser.add_argument(
         "--lazy-view",
@@ -41,19 +45,28 @@ def cli():
         help="Enable debug logging (can also be set through 'VEGALITE_VIEWER_DEBUG' environment variable)",
     )
 
-    args = parser.parse_args()
+    return parser.parse_args()
 
-    # Complementary options from environment (lower precedence than CLI args)
-    load_dotenv(".env", override=True)
 
-    if not args.debug and os.getenv("VEGALITE_VIEWER_DEBUG", ""):
-        args.debug = os.getenv("VEGALITE_VIEWER_DEBUG", "").lower() in (
-            "1",
-            "true",
-            "yes",
-            "on",
+def cli():
+    """Parse command line arguments."""
+    if len(sys.argv) == 1:
+        # No arguments given, skip argument parser construction and use defaults
+        args = argparse.Namespace(
+            port=DEFAULT_VIEWER_PORT, lazy_view=False, silent=False, debug=False
         )
-        args.debug = True
+    else:
+        args = _parse_args()
+
+    # Complementary options from environment (lower precedence than CLI args),
+    # import dotenv only if there actually is a .env file to load
+    if os.path.isfile(".env"):
+        from dotenv import load_dotenv
+
+        load_dotenv(".env", override=True)
+
+    if not args.debug:
+        args.debug = os.getenv("VEGALITE_VIEWER_DEBUG", "").lower() in TRUTHY_ENV_VALUES
 
     return args
 
@@ -71,14 +84,30 @@ def configure_logging(args):
     # When using stdio transport, stdio is reserved for MCP JSON-RPC traffic.
     # Therefore redirect logging to stderr and a log file.
     log_file = os.path.join(tempfile.gettempdir(), f"{__package__}.log")
+    file_handler = logging.FileHandler(
+        log_file, mode="w"
+    )  # truncate log file on startup
+    file_handler.setFormatter(logging.Formatter(log_format))
+
+    # Buffer debug log records and write them to log file in batches, more important
+    # ones get written immediately so that they don't get lost when the MCP client
+    # terminates this MCP server without a graceful shutdown
+    buffered_file_handler = MemoryHandler(
+        capacity=LOG_BUFFER_CAPACITY,
+        flushLevel=LOG_BUFFER_FLUSH_LEVEL,
+        target=file_handler,
+        flushOnClose=True,
+    )
+    atexit.register(buffered_file_handler.flush)
+
     logging.basicConfig(
         level=log_level,
         format=log_format,
-        handlers=[
-            logging.StreamHandler(sys.stderr),
-            logging.FileHandler(log_file, mode="w"),  # truncate log file on startup
-        ],
+        handlers=[logging.StreamHandler(sys.stderr), buffered_file_handler],
     )
+
+    # Don't report errors occurring during logging unless debugging
+    logging.raiseExceptions = args.debug
     logger.info(f"Logging to stderr and file: {log_file}")
 
 
@@ -86,6 +115,14 @@ def main():
     args = cli()
     configure_logging(args)
 
+    # Defer heavy imports until command line arguments have been parsed successfully,
+    # this keeps '--help' and argument errors fast
+    import anyio
+    import fastmcp
+
+    from .mcp_server import VegaLiteViewerError, mcp
+    from .web_browser import web_browser
+
     try:
         # Open browser unless lazy view is enabled
         if not args.lazy_view:
@@ -97,8 +134,17 @@ def main():
         # the viewer web server port
         fastmcp.settings.port = args.port
 
+        # Run MCP server and the viewer web server sharing its event loop on uvloop
+        # where available (not the case on Windows)
+        use_uvloop = importlib.util.find_spec("uvloop") is not None
+        if not use_uvloop:
+            logger.debug("uvloop not available, using default asyncio event loop")
+
         # Start MCP server with stdio transport
-        mcp.run(transport="stdio")
+        anyio.run(
+            partial(mcp.run_async, transport="stdio"),
+            backend_options={"use_uvloop": use_uvloop},
+        )
     except KeyboardInterrupt:
         # Graceful shutdown, suppress noisy logs resulting from asyncio.run task cancellation propagation
         pass
@@ -6,6 +6,7 @@ from typing import Any
 
 import fastmcp
 import httpx
+import orjson
 from fastmcp import Context, FastMCP
 
 from . import LOCALHOST
@@ -38,6 +39,9 @@ How to use this tool:
 # Create viewer manager instance internal to the MCP server
 _web_server_controller = WebServerController()
 
+# HTTP client for sending visualizations to viewer web server, shared across tool calls
+_http_client: httpx.AsyncClient | None = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -67,12 +71,37 @@ async def mcp_lifespan(server: FastMCP) -> AsyncIterator:
             f"Failed to start of viewer web server on port {fastmcp.settings.port}: {e}"
         )
 
+    # Set up HTTP client keeping connections to viewer web server alive between visualizations
+    global _http_client
+    _http_client = httpx.AsyncClient(
+        base_url=f"http://{LOCALHOST}:{fastmcp.settings.port}",
+        limits=httpx.Limits(max_keepalive_connections=4),
+    )
+
     try:
         yield
     finally:
+        await _http_client.aclose()
+        _http_client = None
         await _web_server_controller.shutdown()
 
 
+def _encode_visualization_specification(
+    vegalite_specification: dict, encoded_data: bytes
+) -> bytes:
+    """Encode the visualization specification to be sent to the viewer web server, i.e., the given Vega-Lite
+    specification with the given already encoded dataset spliced in as inline data."""
+    encoded_specification = orjson.dumps(vegalite_specification)
+    separator = b"," if len(encoded_specification) > 2 else b""
+    return (
+        encoded_specification[:-1]
+        + separator
+        + b'"data":{"values":'
+        + encoded_data
+        + b"}}"
+    )
+
+
 # Initialize the server
 mcp = FastMCP("Vega-Lite", lifespan=mcp_lifespan)
 
@@ -101,7 +130,7 @@ async def upload_data(name: str, data: list[Any], ctx: Context) -> str:
 
     Raises:
         ValueError: If name is empty or data is invalid
-        TypeError: If data is not a list
+        TypeError: If data is not a list or cannot be encoded as JSON
 
     Note:
         FastMCP automatically converts exceptions into MCP error responses.
@@ -118,24 +147,34 @@ async def upload_data(name: str, data: list[Any], ctx: Context) -> str:
     if len(data) == 0:
         raise ValueError("Dataset cannot be empty")
 
-    # Validate that each item in data is a dictionary (record/object)
-    for i, item in enumerate(data):
-        if not isinstance(item, dict):
-            raise TypeError(
-                f"Data item at index {i} must be a dictionary/object, got {type(item).__name__}"
-            )
+    # Validate that each item in data is a dictionary (record/object), only
+    # locate the offending item when the fast check fails
+    if not all(isinstance(item, dict) for item in data):
+        for i, item in enumerate(data):
+            if not isinstance(item, dict):
+                raise TypeError(
+                    f"Data item at index {i} must be a dictionary/object, got {type(item).__name__}"
+                )
+
+    logger.info("Uploading dataset '%s' (length: %d)...", name, len(data))
 
-    logger.info(f"Uploading dataset '{name}' (length: {len(data)})...")
+    # Encode the dataset as JSON, the encoding gets reused by all subsequent
+    # visualizations of the same dataset
+    try:
+        encoded_data = orjson.dumps(data)
+    except orjson.JSONEncodeError as e:
+        raise TypeError(f"Dataset '{name}' cannot be encoded as JSON: {e}")
 
     # Initialize session data storage if it doesn't exist
-    if not hasattr(ctx.session, "registered_data"):
-        setattr(ctx.session, "registered_data", {})
+    registered_data = getattr(ctx.session, "registered_data", None)
+    if registered_data is None:
+        registered_data = {}
+        setattr(ctx.session, "registered_data", registered_data)
 
-    # Store the dataset in the session context
-    registered_data = getattr(ctx.session, "registered_data")
-    registered_data[name] = data
+    # Store the dataset in the session context along with its JSON encoding
+    registered_data[name] = (data, encoded_data)
 
-    logger.info(f"Dataset '{name}' successfully registered with {len(data)} records")
+    logger.info("Dataset '%s' successfully registered with %d records", name, len(data))
     return f"Your dataset has been successfully uploaded and registered as '{name}' with {len(data)} records"
 
 
@@ -171,57 +210,82 @@ async def visualize_data(name: str, spec: Any, ctx: Context) -> str:
     if not spec:
         raise ValueError("Vega-Lite specification cannot be empty")
 
-    if not isinstance(spec, dict | str):
+    # Check for exact types first and fall back to subclasses only if needed
+    spec_type = type(spec)
+    if spec_type is dict or spec_type is str:
+        spec_is_json_string = spec_type is str
+    elif isinstance(spec, dict | str):
+        spec_is_json_string = isinstance(spec, str)
+    else:
         raise TypeError("Vega-Lite specification must be a dictionary or JSON string")
 
-    logger.info(f"Visualizing dataset '{name}'...")
+    logger.info("Visualizing dataset '%s'...", name)
 
     # (Re-)open web browser with viewer app
     web_browser.open(fastmcp.settings.port)
 
     # Check if session has registered data and if specified dataset exists
-    if not hasattr(ctx.session, "registered_data"):
+    registered_data = getattr(ctx.session, "registered_data", None)
+    if registered_data is None:
         raise KeyError("No datasets have been uploaded in this session")
 
-    registered_data = getattr(ctx.session, "registered_data")
-    if name not in registered_data:
+    registered_dataset = registered_data.get(name)
+    if registered_dataset is None:
         available_datasets = list(registered_data.keys())
         raise KeyError(
             f"Dataset '{name}' not found. Available datasets: {available_datasets}"
         )
 
-    # Parse the provided Vega-Lite specification with enhanced error handling
-    try:
-        if isinstance(spec, str):
-            vegalite_specification = json.loads(spec)
-        else:
-            vegalite_specification = (
-                spec.copy()
-            )  # Create a copy to avoid modifying original
-    except json.JSONDecodeError as e:
-        raise json.JSONDecodeError(
-            f"Invalid JSON in Vega-Lite specification: {e.msg}", e.doc, e.pos
-        )
+    data, encoded_data = registered_dataset
+
+    # Obtain Vega-Lite specification without any data (the specified dataset from session
+    # context gets added in already encoded form afterwards)
+    if spec_is_json_string:
+        # Parse the provided Vega-Lite specification with enhanced error handling
+        try:
+            vegalite_specification = orjson.loads(spec)
+        except orjson.JSONDecodeError as e:
+            raise json.JSONDecodeError(
+                f"Invalid JSON in Vega-Lite specification: {e.msg}", e.doc, e.pos
+            )
 
-    # Validate that spec is a dictionary after parsing
-    if not isinstance(vegalite_specification, dict):
-        raise TypeError("Vega-Lite specification must be a JSON object/dictionary")
+        # Validate that spec is a dictionary after parsing
+        if type(vegalite_specification) is not dict:
+            raise TypeError("Vega-Lite specification must be a JSON object/dictionary")
 
-    # Add specified dataset from session context
-    registered_data = getattr(ctx.session, "registered_data")
-    data = registered_data[name]
-    vegalite_specification["data"] = {"values": data}
+        # Freshly parsed specification can be modified in place
+        vegalite_specification.pop("data", None)
+    elif "data" in spec:
+        # Build a new top-level dict to avoid modifying original
+        vegalite_specification = {k: v for k, v in spec.items() if k != "data"}
+    else:
+        vegalite_specification = spec
 
-    logger.info(f"Creating visualization for dataset '{name}' with {len(data)} records")
+    logger.info(
+        "Creating visualization for dataset '%s' with %d records", name, len(data)
+    )
 
     # Send the completed visualization specification to viewer web server via HTTP POST
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"http://{LOCALHOST}:{fastmcp.settings.port}/live-data",
-                json={"spec": vegalite_specification},
+        if _http_client is None:
+            raise RuntimeError("MCP server lifespan has not been started")
+        visualization_specification = _encode_visualization_specification(
+            vegalite_specification, encoded_data
+        )
+        response = await _http_client.post(
+            "/live-spec",
+            content=visualization_specification,
+            headers={"Content-Type": "application/json"},
+        )
+        if response.status_code == 404:
+            # Viewer web server has been started by another MCP server instance of an older version which doesn't
+            # provide the /live-spec endpoint yet, fall back to sending the wrapped visualization specification
+            response = await _http_client.post(
+                "/live-data",
+                content=b'{"spec":' + visualization_specification + b"}",
+                headers={"Content-Type": "application/json"},
             )
-            response.raise_for_status()
+        response.raise_for_status()
         return f"The visualization of the '{name}' dataset has been successfully created and sent to the viewer app running in your web browser (see http://{LOCALHOST}:{fastmcp.settings.port})."
     except httpx.RequestError as e:
         raise httpx.RequestError(
@@ -1,29 +1,51 @@
+import asyncio
+
 from fastapi import WebSocket
 
+# Number of viewer clients a new visualization gets sent to at once before yielding to other tasks
+VIEWER_BROADCAST_BATCH_SIZE = 50
+
 
 class ViewerManager:
     def __init__(self):
-        self.active_viewer_connections: list[WebSocket] = []
-        self.last_visualization = None
+        self.active_viewer_connections: set[WebSocket] = set()
+        self.last_visualization: bytes | None = None
 
     async def connect(self, websocket: WebSocket):
         # Register new viewer client
         await websocket.accept()
-        self.active_viewer_connections.append(websocket)
+        self.active_viewer_connections.add(websocket)
 
         # Sync new viewer client with latest visualization (if any)
         if self.last_visualization:
-            await websocket.send_text(self.last_visualization)
+            await websocket.send_bytes(self.last_visualization)
 
     def disconnect(self, websocket: WebSocket):
         # Unregister viewer client
-        if websocket in self.active_viewer_connections:
-            self.active_viewer_connections.remove(websocket)
-
-    async def broadcast_visualization(self, visualization: str):
-        # Send new visualization to all connected viewer clients
-        for connection in self.active_viewer_connections:
-            await connection.send_text(visualization)
+        self.active_viewer_connections.discard(websocket)
 
-        # Update latest visualization
+    async def broadcast_visualization(self, visualization: bytes):
+        # Update latest visualization first so that viewer clients connecting while
+        # the broadcast is in progress get synced with it
         self.last_visualization = visualization
+
+        # Send new UTF-8 encoded visualization as is to all connected viewer clients,
+        # concurrently within batches and yielding to other tasks in between
+        connections = tuple(self.active_viewer_connections)
+        unreachable_connections = set()
+        for start in range(0, len(connections), VIEWER_BROADCAST_BATCH_SIZE):
+            if start > 0:
+                await asyncio.sleep(0)
+            batch = connections[start : start + VIEWER_BROADCAST_BATCH_SIZE]
+            results = await asyncio.gather(
+                *(connection.send_bytes(visualization) for connection in batch),
+                return_exceptions=True,
+            )
+            unreachable_connections.update(
+                connection
+                for connection, result in zip(batch, results, strict=True)
+                if isinstance(result, Exception)
+            )
+
+        # Unregister viewer clients that could not be reached all at once
+        self.active_viewer_connections -= unreachable_connections
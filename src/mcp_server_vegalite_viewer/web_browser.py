@@ -1,9 +1,12 @@
-import json
+import atexit
 import logging
 import os
-import threading
+import tempfile
 import time
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
 
 from . import LOCALHOST
 
@@ -15,95 +18,99 @@ WEB_BROWSER_REOPEN_DISABLED_UNTIL_KEY = "reopen_disabled_until"
 
 logger = logging.getLogger(__name__)
 
+# Write state file in background to avoid blocking the caller (usually the asyncio event loop) with file I/O,
+# a single worker thread makes sure that writes happen in the order they were requested
+_state_io_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="web-browser-state-io"
+)
+atexit.register(_state_io_executor.shutdown, wait=True)
+
 
 class WebBrowserController:
     def __init__(self, reopen_secs=WEB_BROWSER_REOPEN_SECS):
-        self._opened = False
-        self._reopen_timer = None
+        self._reopen_at = 0.0
         self._reopen_secs = reopen_secs
+        self._state_dir_ready = False
         self._load_state()
 
     def _load_state(self):
-        if os.path.exists(WEB_BROWSER_CONTROLLER_STATE_FILE):
-            try:
-                # Load persisted state
-                with open(WEB_BROWSER_CONTROLLER_STATE_FILE) as f:
-                    # Do nothing if state file is empty or contains only whitespace
-                    content = f.read().strip()
-                    if not content:
-                        return
-
-                    # Try to parse as JSON
-                    state = json.loads(content)
-                    reopen_disabled_until = state.get(
-                        WEB_BROWSER_REOPEN_DISABLED_UNTIL_KEY, 0
-                    )
-
-                    # Adjust runtime state
-                    now = time.time()
-                    if now < reopen_disabled_until:
-                        self._opened = True
-                        delay = reopen_disabled_until - now
-                        self._reopen_timer = threading.Timer(delay, self._enable)
-                        self._reopen_timer.daemon = True
-                        self._reopen_timer.start()
-                    else:
-                        self._opened = False
-            except json.JSONDecodeError as e:
-                logger.warning(f"State file contains invalid JSON: {e}")
-                self._opened = False
-            except Exception as e:
-                logger.warning(f"Failed to load web browser controller state: {e}")
-                self._opened = False
+        try:
+            # Do nothing if state file is too small to contain any state
+            if os.stat(WEB_BROWSER_CONTROLLER_STATE_FILE).st_size <= 2:
+                return
+
+            # Load persisted state
+            with open(WEB_BROWSER_CONTROLLER_STATE_FILE, "rb") as f:
+                state = orjson.loads(f.read())
+            reopen_disabled_until = state.get(WEB_BROWSER_REOPEN_DISABLED_UNTIL_KEY, 0)
+
+            # Adjust runtime state (translate persisted wall-clock time
+            # into monotonic clock time of this process)
+            now = time.time()
+            if now < reopen_disabled_until:
+                self._reopen_at = time.monotonic() + (reopen_disabled_until - now)
+            else:
+                self._reopen_at = 0.0
+        except FileNotFoundError:
+            # Do nothing if state file doesn't exist
+            return
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"State file contains invalid JSON: {e}")
+            self._reopen_at = 0.0
+        except Exception as e:
+            logger.warning(f"Failed to load web browser controller state: {e}")
+            self._reopen_at = 0.0
 
     def _save_state(self, reopen_disabled_until):
-        try:
-            # Make sure that parent folder of state file exists
-            os.makedirs(
-                os.path.dirname(WEB_BROWSER_CONTROLLER_STATE_FILE), exist_ok=True
-            )
+        _state_io_executor.submit(self._write_state, reopen_disabled_until)
 
-            # Persit current state
-            with open(WEB_BROWSER_CONTROLLER_STATE_FILE, "w") as f:
+    def _write_state(self, reopen_disabled_until):
+        tmp_state_file = None
+        try:
+            # Make sure that parent folder of state file exists (once per process)
+            state_dir = os.path.dirname(WEB_BROWSER_CONTROLLER_STATE_FILE)
+            if not self._state_dir_ready:
+                os.makedirs(state_dir, exist_ok=True)
+                self._state_dir_ready = True
+
+            # Persist current state atomically by writing to a temporary file next to the
+            # state file first and replacing the state file with it afterwards, so that other
+            # MCP server instances never get to see a partially written state file
+            fd, tmp_state_file = tempfile.mkstemp(dir=state_dir)
+            with os.fdopen(fd, "wb") as f:
                 state = {WEB_BROWSER_REOPEN_DISABLED_UNTIL_KEY: reopen_disabled_until}
-                json.dump(state, f, indent=2)
+                f.write(orjson.dumps(state, option=orjson.OPT_INDENT_2))
+            os.replace(tmp_state_file, WEB_BROWSER_CONTROLLER_STATE_FILE)
+            tmp_state_file = None
         except Exception as e:
             logger.warning(f"Failed to save web browser controller state: {e}")
-
-    def _disable(self):
+        finally:
+            # Clean up temporary file if it could not replace the state file
+            if tmp_state_file is not None:
+                try:
+                    os.remove(tmp_state_file)
+                except FileNotFoundError:
+                    pass
+
+    def _disable(self, now: float):
         logger.info(
             f"Disabling automatic opening of web browser for the next {self._reopen_secs}s"
         )
-        self._opened = True
-
-        # Start reopen timer
-        if self._reopen_timer is not None:
-            self._reopen_timer.cancel()
-        self._reopen_timer = threading.Timer(self._reopen_secs, self._enable)
-        self._reopen_timer.daemon = True
-        self._reopen_timer.start()
+        self._reopen_at = now + self._reopen_secs
 
         # Persist next reopen time
         reopen_disabled_until = time.time() + self._reopen_secs
         self._save_state(reopen_disabled_until)
 
-    def _enable(self):
-        logger.info("Re-enabling automatic opening of web browser")
-        self._opened = False
-
-        # Clear reopen timer
-        self._reopen_timer = None
-
-        # Clear persisted next reopen time
-        self._save_state(0)
-
     def open(self, port: int):
-        if not self._opened:
+        # Automatic opening of web browser gets re-enabled as soon as reopen time has been reached
+        now = time.monotonic()
+        if now >= self._reopen_at:
             logger.info(
                 f"Opening viewer app running at http://{LOCALHOST}:{port} in default web browser"
             )
             webbrowser.open(f"http://{LOCALHOST}:{port}")
-            self._disable()
+            self._disable(now)
 
 
 # Create a singleton instance for use throughout the app
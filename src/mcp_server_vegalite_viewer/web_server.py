@@ -1,38 +1,36 @@
 import asyncio
-import copy
+import functools
 import importlib.resources as resources
-import json
 import logging
 import os
 import socket
 import tempfile
 import time
 import warnings
+from logging.handlers import MemoryHandler
 from typing import Any
 
+import httpx
+import orjson
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request, WebSocket
 from fastapi.responses import RedirectResponse, Response
 from pydantic import BaseModel
 from uvicorn.config import LOGGING_CONFIG
 
-from . import LOCALHOST
+from . import LOCALHOST, LOG_BUFFER_CAPACITY, LOG_BUFFER_FLUSH_LEVEL
 from .viewer_manager import ViewerManager
 
 # Suppress specific deprecation warnings from websockets/uvicorn until they fix the compatibility issue. These warnings
 # come from uvicorn's internal usage of websockets library, not our code
 # (see https://github.com/encode/uvicorn/discussions/2476 for details)
-warnings.filterwarnings(
-    "ignore", message="websockets.legacy is deprecated", category=DeprecationWarning
-)
-warnings.filterwarnings(
-    "ignore",
-    message="websockets.server.WebSocketServerProtocol is deprecated",
-    category=DeprecationWarning,
-)
 warnings.filterwarnings(
     "ignore",
-    message="remove second argument of ws_handler",
+    message=(
+        r"websockets\.legacy is deprecated"
+        r"|websockets\.server\.WebSocketServerProtocol is deprecated"
+        r"|remove second argument of ws_handler"
+    ),
     category=DeprecationWarning,
 )
 
@@ -41,6 +39,9 @@ WEB_SERVER_CONTROLLER_STATE_FILE = os.path.join(
     os.path.expanduser("~"), ".mcp", __package__, ".web_server_controller_state.json"
 )
 WEB_SERVER_LOCKED_PORTS_KEY = "locked_ports"
+VEGALITE_FAVICON_URL = "https://vega.github.io/favicon.ico"
+VEGALITE_FAVICON_FETCH_TIMEOUT_SECS = 5
+VEGALITE_FAVICON_MAX_AGE_SECS = 86400
 
 logger = logging.getLogger(__name__)
 
@@ -74,55 +75,132 @@ class PortInUseByAnotherServiceError(Exception):
 _viewer_manager = ViewerManager()
 
 
-# Request model for live data endpoint
-class LiveDataRequest(BaseModel):
-    spec: Any
+# Viewer HTML template and sample visualization specification, loaded once as package resources don't change at runtime
+# (the latter is valid JSON already and can be broadcast as is)
+_VIEWER_HTML_TEMPLATE = resources.read_text(f"{__package__}.resources", "viewer.html")
+_SAMPLE_SPEC_CONTENT = resources.read_text(
+    f"{__package__}.resources", "sample-visualization-spec.json"
+).encode("utf-8")
+
+
+# Response model for endpoints reporting the status of a broadcast (declaring it as return type lets FastAPI
+# serialize responses via Pydantic directly)
+class StatusResponse(BaseModel):
+    status: str
+    message: str
 
 
 app = FastAPI()
 
 
+def _render_viewer_html(port: int) -> bytes:
+    """Renders viewer.html by substituting {{port}} placeholder(s) with given web server port."""
+    # Fill in the actual web server port
+    return _VIEWER_HTML_TEMPLATE.replace("{{port}}", str(port)).encode("utf-8")
+
+
 @app.get("/")
 async def root(request: Request):
-    """Renders viewer.html by substituting {{port}} placeholder(s) with actual web server port and returns resulting
-    HTML content to the client (web browser)."""
-    # Load viewer html template
-    viewer_html_template = resources.read_text(
-        f"{__package__}.resources", "viewer.html"
-    )
-
-    # Fill in the actual web server port
-    viewer_html_content = viewer_html_template.replace(
-        "{{port}}", str(request.url.port)
-    )
+    """Returns viewer.html rendered for the actual web server port to the client (web browser)."""
+    # Use viewer HTML content rendered upon web server start if available
+    viewer_html_content = getattr(request.app.state, "rendered_viewer_html", None)
+    if viewer_html_content is None:
+        viewer_html_content = _render_viewer_html(request.url.port)
 
     # Return response containing the rendered viewer HTML content
     return Response(content=viewer_html_content, media_type="text/html")
 
 
+async def _fetch_favicon():
+    """Fetches Vega-Lite's official favicon once so that it can be served locally."""
+    try:
+        async with httpx.AsyncClient(
+            timeout=VEGALITE_FAVICON_FETCH_TIMEOUT_SECS, follow_redirects=True
+        ) as client:
+            response = await client.get(VEGALITE_FAVICON_URL)
+            response.raise_for_status()
+        app.state.favicon = response.content
+    except httpx.HTTPError as e:
+        logger.debug(
+            f"Failed to fetch favicon, redirecting favicon requests instead: {e}"
+        )
+
+
 @app.get("/favicon.ico")
-async def favicon():
-    """Redirects favicon requests to Vega-Lite's official favicon."""
-    return RedirectResponse(url="https://vega.github.io/favicon.ico", status_code=301)
+async def favicon(request: Request):
+    """Returns Vega-Lite's official favicon, or redirects favicon requests to it if it hasn't been fetched."""
+    favicon_content = getattr(request.app.state, "favicon", None)
+    if favicon_content is None:
+        # Use a temporary, non-cacheable redirect so that web browsers come back for the locally served favicon
+        # once it has been fetched (a permanent redirect would be cached by them for good)
+        return RedirectResponse(
+            url=VEGALITE_FAVICON_URL,
+            status_code=307,
+            headers={"Cache-Control": "no-store"},
+        )
+
+    return Response(
+        content=favicon_content,
+        media_type="image/x-icon",
+        headers={"Cache-Control": f"public, max-age={VEGALITE_FAVICON_MAX_AGE_SECS}"},
+    )
 
 
 @app.get("/sample-data")
-async def sample_data():
+async def sample_data() -> StatusResponse:
     """Loads and broadcasts sample visualization specification to connected clients (web browsers) for demonstration purposes."""
     try:
-        # Load sample visualization specification
-        sample_spec_content = resources.read_text(
-            f"{__package__}.resources", "sample-visualization-spec.json"
+        # Broadcast sample visualization to all connected clients
+        await _viewer_manager.broadcast_visualization(_SAMPLE_SPEC_CONTENT)
+
+        return StatusResponse(
+            status="success",
+            message="Sample visualization specification successfully sent to connected clients",
+        )
+    except Exception as e:
+        msg = f"Failed to broadcast live visualization specification: {e}"
+        logger.error(msg)
+        raise HTTPException(status_code=500, detail=msg)
+
+
+def _require_json_content_type(request: Request):
+    """Rejects requests which don't declare a JSON body. Besides malformed requests, this keeps arbitrary web pages
+    from pushing visualizations to the viewer web server by means of simple cross-site requests (which can't use a
+    JSON content type without triggering a CORS preflight)."""
+    media_type = (
+        request.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    )
+    maintype, _, subtype = media_type.partition("/")
+    if maintype != "application" or not (
+        subtype == "json" or subtype.endswith("+json")
+    ):
+        raise HTTPException(
+            status_code=415,
+            detail="Request body must be of media type application/json",
+        )
+
+
+@app.post("/live-spec")
+async def live_spec(request: Request) -> StatusResponse:
+    """Receives UTF-8 encoded JSON visualization specifications composed of a Vega-Lite specification and a dataset as
+    raw request body and broadcasts them to connected visualization clients (web browsers)."""
+    # Read visualization specification from raw request body, it is forwarded to the clients as is without being
+    # parsed (so that large datasets don't need to be decoded and encoded again)
+    _require_json_content_type(request)
+    spec_json = await request.body()
+    if not spec_json:
+        raise HTTPException(
+            status_code=422, detail="Invalid live spec request: empty request body"
         )
-        sample_spec_json = json.loads(sample_spec_content)
 
-        # Broadcast visualization to all connected clients
-        await _viewer_manager.broadcast_visualization(json.dumps(sample_spec_json))
+    try:
+        # Broadcast visualization specification to all connected clients
+        await _viewer_manager.broadcast_visualization(spec_json)
 
-        return {
-            "status": "success",
-            "message": "Sample visualization specification successfully sent to connected clients",
-        }
+        return StatusResponse(
+            status="success",
+            message="Visualization specification successfully sent to connected clients",
+        )
     except Exception as e:
         msg = f"Failed to broadcast live visualization specification: {e}"
         logger.error(msg)
@@ -130,23 +208,33 @@ async def sample_data():
 
 
 @app.post("/live-data")
-async def live_data(request: LiveDataRequest):
-    """Receives visualization specifications composed of a Vega-Lite specification and a dataset and broadcasts them to
-    connected visualization clients (web browsers)."""
+async def live_data(request: Request) -> StatusResponse:
+    """Receives visualization specifications composed of a Vega-Lite specification and a dataset wrapped in a
+    {"spec": ...} object and broadcasts them to connected visualization clients (web browsers). Kept for compatibility
+    with MCP server instances of older versions sharing this viewer web server, prefer /live-spec which doesn't need to
+    parse the request body."""
+    # Read visualization specification from raw request body, it is forwarded to the clients as is and therefore
+    # doesn't need to be validated any further
+    _require_json_content_type(request)
     try:
-        # Convert visualization specification to JSON string if it's not already
-        if isinstance(request.spec, str):
-            spec_json = request.spec
+        spec = orjson.loads(await request.body())["spec"]
+    except (orjson.JSONDecodeError, TypeError, KeyError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid live data request: {e}")
+
+    try:
+        # Convert visualization specification to UTF-8 encoded JSON if it's not already a JSON string
+        if isinstance(spec, str):
+            spec_json = spec.encode("utf-8")
         else:
-            spec_json = json.dumps(request.spec)
+            spec_json = orjson.dumps(spec)
 
         # Broadcast visualization specification to all connected clients
         await _viewer_manager.broadcast_visualization(spec_json)
 
-        return {
-            "status": "success",
-            "message": "Visualization specification successfully sent to connected clients",
-        }
+        return StatusResponse(
+            status="success",
+            message="Visualization specification successfully sent to connected clients",
+        )
     except Exception as e:
         msg = f"Failed to broadcast live visualization specification: {e}"
         logger.error(msg)
@@ -156,82 +244,182 @@ async def live_data(request: LiveDataRequest):
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time communication with visualization clients (web browsers)."""
-    await _viewer_manager.connect(websocket)
     try:
-        while True:
-            await websocket.receive_text()  # Keep connection alive, ignore input
-    except Exception:
+        # Register client and sync it with latest visualization (if any), unregister it below even if it drops
+        # during this initial sync already
+        await _viewer_manager.connect(websocket)
+
+        # Keep connection alive until client disconnects, ignore input
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    except Exception as e:
+        logger.debug(f"Viewer client connection lost: {e}")
+    finally:
         _viewer_manager.disconnect(websocket)
 
 
+@functools.lru_cache(maxsize=1)
+def _build_log_config(log_level: int, log_file: str) -> dict[str, Any]:
+    """Builds uvicorn log config for given log level and log file, once per process for the same arguments
+    (the returned log config must therefore not be modified)."""
+    # Start with uvicorn's default logging config (copying only the sections that get
+    # extended below is enough to leave the original untouched)
+    config = {
+        **LOGGING_CONFIG,
+        "formatters": dict(LOGGING_CONFIG["formatters"]),
+        "handlers": dict(LOGGING_CONFIG["handlers"]),
+        "loggers": dict(LOGGING_CONFIG["loggers"]),
+    }
+
+    # Create a plain formatter without colors for logging to a log file
+    config["formatters"]["plain"] = {
+        "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        "datefmt": "%Y-%m-%d %H:%M:%S",
+    }
+
+    # Add a file handler using plain formatter appending to the same log
+    # file as the root logger and buffering log records the same way
+    config["handlers"]["file_unbuffered"] = {
+        "formatter": "plain",
+        "class": "logging.FileHandler",
+        "filename": log_file,
+        "mode": "a",  # append to already existing log
+        "encoding": "utf8",
+    }
+    config["handlers"]["file"] = {
+        "class": "logging.handlers.MemoryHandler",
+        "capacity": LOG_BUFFER_CAPACITY,
+        "flushLevel": LOG_BUFFER_FLUSH_LEVEL,
+        "target": "file_unbuffered",
+    }
+
+    # When using stdio transport, stdio is reserved for MCP JSON-RPC traffic.
+    # Therefore redirect all uvicorn logging to stderr (by using uvicorn's
+    # 'default' handler, see uvicorn.config.LOGGING_CONFIG for details) only
+    # or stderr and the root logger log file.
+    config["loggers"]["uvicorn"] = {"handlers": ["default"], "propagate": False}
+    config["loggers"]["uvicorn.error"] = {
+        "handlers": ["default", "file"],
+        "level": logging.INFO if log_level == logging.DEBUG else logging.ERROR,
+        "propagate": False,
+    }
+    config["loggers"]["uvicorn.access"] = {
+        "handlers": ["default"],
+        "level": logging.INFO if log_level == logging.DEBUG else logging.WARNING,
+        "propagate": False,
+    }
+
+    # Avoid suppression of application logs by configuring root logger to use the Uvicorn log handlers
+    config["root"] = {"handlers": ["default", "file"], "level": log_level}
+
+    return config
+
+
 class WebServerController:
     def __init__(self):
         self._port = None
         self._locked_ports = {}
         self._web_server = None
         self._web_server_task = None
+        self._favicon_task = None
+        self._state_signature = None
 
     def _load_state(self):
         """Load current state from state file."""
-        if os.path.exists(WEB_SERVER_CONTROLLER_STATE_FILE):
-            try:
-                # Load persisted state
-                with open(WEB_SERVER_CONTROLLER_STATE_FILE) as f:
-                    # Do nothing if state file is empty or contains only whitespace
-                    content = f.read().strip()
-                    if not content:
-                        return
-
-                    # Try to parse as JSON
-                    state = json.loads(content)
-                    persisted_ports = state.get(WEB_SERVER_LOCKED_PORTS_KEY, {})
-
-                    # Filter out stale entries
-                    now = time.time()
-                    for port_str, locked_until in persisted_ports.items():
-                        # Expired?
-                        if now >= locked_until:
-                            continue
-                        # Port no longer busy?
-                        if not self._is_port_in_use(int(port_str)):
-                            continue
-                        self._locked_ports[int(port_str)] = locked_until
-            except json.JSONDecodeError as e:
-                logger.warning(f"State file contains invalid JSON: {e}")
-                self._locked_ports = {}
-                raise
-            except Exception as e:
-                logger.warning(f"Failed to load web server controller state: {e}")
-                self._locked_ports = {}
-                raise
+        # Do nothing if state file doesn't exist or hasn't changed since it has been loaded last time
+        try:
+            # Identify state file contents by inode, size and modification time (each write replaces the state file,
+            # i.e., yields a new inode, and the modification time alone is too coarse to tell rapid writes apart)
+            state_stat = os.stat(WEB_SERVER_CONTROLLER_STATE_FILE)
+            state_signature = (
+                state_stat.st_ino,
+                state_stat.st_size,
+                state_stat.st_mtime_ns,
+            )
+        except FileNotFoundError:
+            return
+        if state_signature == self._state_signature:
+            return
+
+        try:
+            # Load persisted state
+            with open(WEB_SERVER_CONTROLLER_STATE_FILE, "rb") as f:
+                # Do nothing if state file is empty or contains only whitespace
+                content = f.read().strip()
+                if not content:
+                    self._state_signature = state_signature
+                    return
+
+                # Try to parse as JSON
+                state = orjson.loads(content)
+                persisted_ports = state.get(WEB_SERVER_LOCKED_PORTS_KEY, {})
+
+                # Filter out expired entries (entries for ports which are no longer busy
+                # get filtered out separately, see _reconcile_locked_ports())
+                now = time.time()
+                for port_str, locked_until in persisted_ports.items():
+                    if now >= locked_until:
+                        continue
+                    self._locked_ports[int(port_str)] = locked_until
+            self._state_signature = state_signature
+        except FileNotFoundError:
+            # State file has been removed in the meantime
+            return
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"State file contains invalid JSON: {e}")
+            self._locked_ports = {}
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to load web server controller state: {e}")
+            self._locked_ports = {}
+            raise
 
     def _save_state(self):
         """Save current state to state file."""
+        tmp_state_file = None
         try:
             # Make sure that parent folder of state file exists
-            os.makedirs(
-                os.path.dirname(WEB_SERVER_CONTROLLER_STATE_FILE), exist_ok=True
-            )
-
-            # Persist current state
-            with open(WEB_SERVER_CONTROLLER_STATE_FILE, "w") as f:
+            state_dir = os.path.dirname(WEB_SERVER_CONTROLLER_STATE_FILE)
+            os.makedirs(state_dir, exist_ok=True)
+
+            # Persist current state atomically by writing it to a temporary file next to the
+            # state file first and replacing the state file with it afterwards, so that other
+            # viewer web server instances never get to see a partially written state file
+            fd, tmp_state_file = tempfile.mkstemp(dir=state_dir)
+            with os.fdopen(fd, "wb") as f:
                 state = {
                     WEB_SERVER_LOCKED_PORTS_KEY: {
                         str(port): locked_until
                         for port, locked_until in self._locked_ports.items()
                     }
                 }
-                json.dump(state, f, indent=2)
+                f.write(orjson.dumps(state))
                 f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_state_file, WEB_SERVER_CONTROLLER_STATE_FILE)
+            tmp_state_file = None
+
+            # Make sure that changed state file gets loaded again next time
+            self._state_signature = None
         except Exception as e:
             logger.warning(f"Failed to save web server controller state: {e}")
             raise
+        finally:
+            # Clean up temporary file if it could not replace the state file
+            if tmp_state_file is not None:
+                try:
+                    os.remove(tmp_state_file)
+                except FileNotFoundError:
+                    pass
 
     def _remove_state(self):
         """Remove the entire state file."""
         try:
-            if os.path.exists(WEB_SERVER_CONTROLLER_STATE_FILE):
-                os.remove(WEB_SERVER_CONTROLLER_STATE_FILE)
+            os.remove(WEB_SERVER_CONTROLLER_STATE_FILE)
+            self._state_signature = None
+        except FileNotFoundError:
+            # State file has already been removed
+            self._state_signature = None
         except Exception as e:
             logger.warning(f"Failed to remove web server controller state: {e}")
 
@@ -257,9 +445,19 @@ class WebServerController:
             # No locked ports left, remove the file
             self._remove_state()
 
+    def _reconcile_locked_ports(self):
+        """Remove ports which are no longer busy, e.g., because the viewer web server instance that locked them has
+        been terminated without a graceful shutdown, from the locked ports list."""
+        stale_ports = [
+            port for port in self._locked_ports if not self._is_port_in_use(port)
+        ]
+        for port in stale_ports:
+            del self._locked_ports[port]
+
     def is_already_running_on_same_port(self, port: int) -> bool:
         """Check if another viewer web server instance is already running on the specified port."""
         self._load_state()
+        self._reconcile_locked_ports()
         return port in self._locked_ports
 
     def _is_port_in_use(self, port: int) -> bool:
@@ -275,9 +473,13 @@ class WebServerController:
         # Get the log level from the root logger
         log_level = logging.getLogger().getEffectiveLevel()
 
-        # Get the log file from the root logger's file handler
+        # Get the log file from the root logger's (potentially buffered) file handler
         log_file = None
         for handler in logging.getLogger().handlers:
+            if isinstance(handler, MemoryHandler):
+                # Write out buffered log records before root logger handlers get replaced
+                handler.flush()
+                handler = handler.target
             if isinstance(handler, logging.FileHandler):
                 log_file = handler.baseFilename
                 break
@@ -285,45 +487,7 @@ class WebServerController:
             # Fallback if no file handler found
             log_file = os.path.join(tempfile.gettempdir(), "uvicorn.log")
 
-        # Start with uvicorn's default logging config
-        config = copy.deepcopy(LOGGING_CONFIG)
-
-        # Create a plain formatter without colors for logging to a log file
-        config["formatters"]["plain"] = {
-            "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-            "datefmt": "%Y-%m-%d %H:%M:%S",
-        }
-
-        # Add a file handler using plain formatter appending to the same log
-        # file as the root logger
-        config["handlers"]["file"] = {
-            "formatter": "plain",
-            "class": "logging.FileHandler",
-            "filename": log_file,
-            "mode": "a",  # append to already existing log
-            "encoding": "utf8",
-        }
-
-        # When using stdio transport, stdio is reserved for MCP JSON-RPC traffic.
-        # Therefore redirect all uvicorn logging to stderr (by using uvicorn's
-        # 'default' handler, see uvicorn.config.LOGGING_CONFIG for details) only
-        # or stderr and the root logger log file.
-        config["loggers"]["uvicorn"] = {"handlers": ["default"], "propagate": False}
-        config["loggers"]["uvicorn.error"] = {
-            "handlers": ["default", "file"],
-            "level": logging.INFO if log_level == logging.DEBUG else logging.ERROR,
-            "propagate": False,
-        }
-        config["loggers"]["uvicorn.access"] = {
-            "handlers": ["default"],
-            "level": logging.INFO if log_level == logging.DEBUG else logging.WARNING,
-            "propagate": False,
-        }
-
-        # Avoid suppression of application logs by configuring root logger to use the Uvicorn log handlers
-        config["root"] = {"handlers": ["default", "file"], "level": log_level}
-
-        return config
+        return _build_log_config(log_level, log_file)
 
     def start(self, port: int):
         """Start the viewer web server if there is not another one already running on the specified port
@@ -341,12 +505,15 @@ class WebServerController:
         self._lock_port(port, port_locked_until)
         self._port = port
 
-        # Set up viewer web server
+        # Render viewer HTML content once for the port to be used
+        app.state.rendered_viewer_html = _render_viewer_html(self._port)
+
+        # Set up viewer web server (no event loop to be configured, it gets served on the already running event loop
+        # of the MCP server)
         config = uvicorn.Config(
             app,
             host=LOCALHOST,
             port=self._port,
-            loop="asyncio",
             log_config=self._get_log_config(),
         )
         self._web_server = uvicorn.Server(config)
@@ -357,19 +524,25 @@ class WebServerController:
         # Create the task and store reference
         self._web_server_task = asyncio.create_task(self._web_server.serve())
 
+        # Fetch favicon to be served locally in another background task
+        self._favicon_task = asyncio.create_task(_fetch_favicon())
+
     async def shutdown(self):
         """Gracefully shutdown the viewer web server with proper cleanup."""
         if self._web_server is not None:
             try:
-                # Initiate graceful viewer web server shutdown
+                # Initiate graceful viewer web server shutdown and wait for the server task to complete it (uvicorn's
+                # main loop picks up the exit request and shuts down pending connections on its own)
                 logger.info("Shutting down viewer web server")
                 self._web_server.should_exit = True
-                await self._web_server.shutdown()
+                await self._web_server_task
                 self._web_server = None
+                self._web_server_task = None
 
-                # Cancel the server task if it exists
-                if not self._web_server_task.done():
-                    self._web_server_task.cancel()
+                # Cancel the favicon fetching task if it is still running
+                if self._favicon_task is not None and not self._favicon_task.done():
+                    self._favicon_task.cancel()
+                self._favicon_task = None
 
                 # Remove viewer web server port from locked ports list
                 if self._port is not None: